@@ -1,16 +1,22 @@
 # SPDX-License-Identifier: GPL-2.0-only
 from __future__ import annotations
 
-import datetime
+import functools
+import re
 
 import mipi
 import simple
 import wrap
-from generator import Options, GpioFlag
+from generator import Options, GpioFlag, CURRENT_YEAR
 from panel import Panel, BacklightControl, CommandSequence, CompressionMode
 
+_MIPI_DCS_IDENTIFIER = re.compile(r'MIPI_DCS_\w+')
 
-def generate_includes(p: Panel, options: Options) -> str:
+
+# The includes only depend on a few features of the panel, so the same block
+# is shared between all panels with the same feature set.
+@functools.lru_cache(maxsize=None)
+def _generate_includes(reset_gpio: bool, regulator: bool, backlight: bool, dsc: bool, mipi_dcs: bool) -> str:
 	includes = {
 		'linux': {
 			'module.h',
@@ -26,20 +32,17 @@ def generate_includes(p: Panel, options: Options) -> str:
 		},
 	}
 
-	if p.reset_seq:
+	if reset_gpio:
 		includes['linux'].add('gpio/consumer.h')
-	if options.regulator:
+	if regulator:
 		includes['linux'].add('regulator/consumer.h')
-	if p.backlight == BacklightControl.DCS or options.backlight_fallback_dcs:
+	if backlight:
 		includes['linux'].add('backlight.h')
-	if p.compression_mode == CompressionMode.DSC:
+	if dsc:
 		includes['drm'].add('display/drm_dsc.h')
 		includes['drm'].add('display/drm_dsc_helper.h')
-
-	for cmd in p.cmds.values():
-		if 'MIPI_DCS_' in cmd.generated:
-			includes['video'].add('mipi_display.h')
-			break
+	if mipi_dcs:
+		includes['video'].add('mipi_display.h')
 
 	lines = []
 	for group, headers in includes.items():
@@ -53,6 +56,16 @@ def generate_includes(p: Panel, options: Options) -> str:
 	return '\n'.join(lines)
 
 
+def generate_includes(p: Panel, options: Options) -> str:
+	return _generate_includes(
+		reset_gpio=bool(p.reset_seq),
+		regulator=bool(options.regulator),
+		backlight=p.backlight == BacklightControl.DCS or options.backlight_fallback_dcs,
+		dsc=p.compression_mode == CompressionMode.DSC,
+		mipi_dcs=any(cmd.identifiers for cmd in p.cmds.values()),
+	)
+
+
 def generate_struct(p: Panel, options: Options) -> str:
 	variables = [
 		'struct drm_panel panel',
@@ -69,29 +82,29 @@ def generate_struct(p: Panel, options: Options) -> str:
 			variables.append('struct regulator *supply')
 	variables += [f'struct gpio_desc *{name}_gpio' for name in options.gpios.keys()]
 
-	s = f'struct {p.short_id} {{'
+	parts = [f'struct {p.short_id} {{']
 	for v in variables:
-		s += '\n'
+		parts.append('\n')
 		if v:
-			s += '\t' + v + ';'
-	s += '\n};'
-	return s
+			parts.append('\t' + v + ';')
+	parts.append('\n};')
+	return ''.join(parts)
 
 
 def generate_regulator_bulk(p: Panel, options: Options) -> str:
 	if not options.regulator or len(options.regulator) == 1:
 		return ''
 
-	s = '\n\n'
-	s += f'static const struct regulator_bulk_data {p.short_id}_supplies[] = {{'
+	parts = ['\n\n', f'static const struct regulator_bulk_data {p.short_id}_supplies[] = {{']
 	for r in options.regulator:
-		s += f'\n\t{{ .supply = "{r}" }},'
-	s += '\n};'
-	return s
+		parts.append(f'\n\t{{ .supply = "{r}" }},')
+	parts.append('\n};')
+	return ''.join(parts)
 
 
 # msleep(< 20) will possibly sleep up to 20ms
 # In this case, usleep_range should be used
+@functools.lru_cache(maxsize=256)
 def msleep(m: int) -> str:
 	if m >= 20:
 		return f"msleep({m})"
@@ -105,6 +118,7 @@ def msleep(m: int) -> str:
 
 # msleep(< 20) will possibly sleep up to 20ms
 # In this case, usleep_range should be used
+@functools.lru_cache(maxsize=256)
 def dsi_msleep(m: int) -> str:
 	if m >= 20:
 		return f"mipi_dsi_msleep(&dsi_ctx, {m})"
@@ -116,53 +130,61 @@ def dsi_msleep(m: int) -> str:
 		return f"mipi_dsi_usleep_range(&dsi_ctx, {u}, {u + 1000})"
 
 
+# Invert reset sequence if GPIO is active low
+@functools.lru_cache(maxsize=None)
+def _gpio_state(state: int, active_low: bool) -> str:
+	if active_low:
+		state = int(not bool(state))
+	return str(state)
+
+
 def generate_reset(p: Panel, options: Options) -> str:
 	if not p.reset_seq:
 		return ''
 
-	s = f'\nstatic void {p.short_id}_reset(struct {p.short_id} *ctx)\n{{\n'
+	active_low = bool(options.gpios["reset"] & GpioFlag.ACTIVE_LOW)
+
+	parts = [f'\nstatic void {p.short_id}_reset(struct {p.short_id} *ctx)\n{{\n']
 	for state, sleep in p.reset_seq:
-		# Invert reset sequence if GPIO is active low
-		if options.gpios["reset"] & GpioFlag.ACTIVE_LOW:
-			state = int(not bool(state))
-		s += f'\tgpiod_set_value_cansleep(ctx->reset_gpio, {state});\n'
+		parts.append(f'\tgpiod_set_value_cansleep(ctx->reset_gpio, {_gpio_state(state, active_low)});\n')
 		if sleep:
-			s += f'\t{msleep(sleep)};\n'
-	s += '}\n'
+			parts.append(f'\t{msleep(sleep)};\n')
+	parts.append('}\n')
 
-	return s
+	return ''.join(parts)
 
 
 def generate_commands(p: Panel, options: Options, cmd_name: str) -> str:
 	cmd = p.cmds[cmd_name]
 
-	s = f'''\
+	parts = [f'''\
 static int {p.short_id}_{cmd_name}(struct {p.short_id} *ctx)
 {{
 	struct mipi_dsi_multi_context dsi_ctx = {{ .dsi = ctx->dsi }};
-'''
+''']
 
 	if p.cmds['on'].state != p.cmds['off'].state:
 		if cmd.state == CommandSequence.State.LP_MODE:
-			s += '\n\tctx->dsi->mode_flags |= MIPI_DSI_MODE_LPM;\n'
+			parts.append('\n\tctx->dsi->mode_flags |= MIPI_DSI_MODE_LPM;\n')
 		elif cmd.state == CommandSequence.State.HS_MODE:
-			s += '\n\tctx->dsi->mode_flags &= ~MIPI_DSI_MODE_LPM;\n'
+			parts.append('\n\tctx->dsi->mode_flags &= ~MIPI_DSI_MODE_LPM;\n')
 
 	block = True
 	for c in cmd.seq:
-		if block or '{' in c.generated:
-			s += '\n'
-		block = '{' in c.generated
+		is_block = '{' in c.generated
+		if block or is_block:
+			parts.append('\n')
+		block = is_block
 
-		s += c.generated + '\n'
+		parts.append(c.generated + '\n')
 		if c.wait and c.wait > options.ignore_wait:
-			s += f'\t{dsi_msleep(c.wait)};\n'
+			parts.append(f'\t{dsi_msleep(c.wait)};\n')
 
-	s += '''
+	parts.append('''
 	return dsi_ctx.accum_err;
 }
-'''
-	return s
+''')
+	return ''.join(parts)
 
 
 def generate_cleanup(p: Panel, options: Options, indent: int = 1) -> str:
@@ -183,53 +205,53 @@ def generate_cleanup(p: Panel, options: Options, indent: int = 1) -> str:
 
 
 def generate_prepare(p: Panel, options: Options) -> str:
-	s = f'''\
+	parts = [f'''\
 static int {p.short_id}_prepare(struct drm_panel *panel)
 {{
 	struct {p.short_id} *ctx = to_{p.short_id}(panel);
 	struct device *dev = &ctx->dsi->dev;
-'''
+''']
 
 	if p.compression_mode == CompressionMode.DSC:
-		s += '''\
+		parts.append('''\
 	struct drm_dsc_picture_parameter_set pps;
-'''
+''')
 
-	s += f'''\
+	parts.append(f'''\
 	int ret;
-'''
+''')
 
 	if options.regulator:
 		if len(options.regulator) > 1:
-			s += f'''
+			parts.append(f'''
 	ret = regulator_bulk_enable(ARRAY_SIZE({p.short_id}_supplies), ctx->supplies);
 	if (ret < 0) {{
 		dev_err(dev, "Failed to enable regulators: %d\\n", ret);
 		return ret;
 	}}
-'''
+''')
 		else:
-			s += '''
+			parts.append('''
 	ret = regulator_enable(ctx->supply);
 	if (ret < 0) {
 		dev_err(dev, "Failed to enable regulator: %d\\n", ret);
 		return ret;
 	}
-'''
+''')
 
 	if p.reset_seq:
-		s += f'\n\t{p.short_id}_reset(ctx);\n'
+		parts.append(f'\n\t{p.short_id}_reset(ctx);\n')
 
-	s += f'''
+	parts.append(f'''
 	ret = {p.short_id}_on(ctx);
 	if (ret < 0) {{
 		dev_err(dev, "Failed to initialize panel: %d\\n", ret);{generate_cleanup(p, options, 2)}
 		return ret;
 	}}
-'''
+''')
 
 	if p.compression_mode == CompressionMode.DSC:
-		s += '''
+		parts.append('''
 	drm_dsc_pps_payload_pack(&pps, &ctx->dsc);
 
 	ret = mipi_dsi_picture_parameter_set(ctx->dsi, &pps);
@@ -245,13 +267,13 @@ def generate_prepare(p: Panel, options: Options) -> str:
 	}
 
 	msleep(28); /* TODO: Is this panel-dependent? */
-'''
+''')
 
-	s += '''
+	parts.append('''
 	return 0;
 }
-'''
-	return s
+''')
+	return ''.join(parts)
 
 
 def generate_unprepare(p: Panel, options: Options) -> str:
@@ -284,25 +306,25 @@ def generate_backlight(p: Panel, options: Options) -> str:
 	if p.max_brightness > 255:
 		brightness_variant = '_large'
 
-	s = f'''\
+	parts = [f'''\
 static int {p.short_id}_bl_update_status(struct backlight_device *bl)
 {{
 	struct mipi_dsi_device *dsi = bl_get_data(bl);
-'''
+''']
 	if options.backlight_gpio:
-		s += f'\tstruct {p.short_id} *ctx = mipi_dsi_get_drvdata(dsi);\n'
+		parts.append(f'\tstruct {p.short_id} *ctx = mipi_dsi_get_drvdata(dsi);\n')
 
-	s += '''\
+	parts.append('''\
 	u16 brightness = backlight_get_brightness(bl);
 	int ret;
-'''
+''')
 
 	if options.backlight_gpio:
-		s += '''
+		parts.append('''
 	gpiod_set_value_cansleep(ctx->backlight_gpio, !!brightness);
-'''
+''')
 
-	s += f'''
+	parts.append(f'''
 	dsi->mode_flags &= ~MIPI_DSI_MODE_LPM;
 
 	ret = mipi_dsi_dcs_set_display_brightness{brightness_variant}(dsi, brightness);
@@ -313,10 +335,10 @@ def generate_backlight(p: Panel, options: Options) -> str:
 
 	return 0;
 }}
-'''
+''')
 
 	if options.dcs_get_brightness:
-		s += f'''
+		parts.append(f'''
 // TODO: Check if /sys/class/backlight/.../actual_brightness actually returns
 // correct values. If not, remove this function.
 static int {p.short_id}_bl_get_brightness(struct backlight_device *bl)
@@ -335,17 +357,17 @@ def generate_backlight(p: Panel, options: Options) -> str:
 
 	return brightness{brightness_mask};
 }}
-'''
+''')
 		get_brightness = f'\n\t.get_brightness = {p.short_id}_bl_get_brightness,'
 	else:
 		get_brightness = ''
 
-	s += f'''
+	parts.append(f'''
 static const struct backlight_ops {p.short_id}_bl_ops = {{
 	.update_status = {p.short_id}_bl_update_status,{get_brightness}
 }};
-'''
-	s += f'''
+''')
+	parts.append(f'''
 static struct backlight_device *
 {p.short_id}_create_backlight(struct mipi_dsi_device *dsi)
 {{
@@ -360,43 +382,43 @@ def generate_backlight(p: Panel, options: Options) -> str:
 					      &{p.short_id}_bl_ops, &props);
 }}
 
-'''
-	return s
+''')
+	return ''.join(parts)
 
 
 def generate_probe(p: Panel, options: Options) -> str:
-	s = f'''\
+	parts = [f'''\
 static int {p.short_id}_probe(struct mipi_dsi_device *dsi)
 {{
 	struct device *dev = &dsi->dev;
 	struct {p.short_id} *ctx;
-'''
+''']
 
-	s += f'''\
+	parts.append(f'''\
 	int ret;
 
 	ctx = devm_kzalloc(dev, sizeof(*ctx), GFP_KERNEL);
 	if (!ctx)
 		return -ENOMEM;
-'''
+''')
 
 	if options.regulator:
 		if len(options.regulator) > 1:
-			s += f'''
+			parts.append(f'''
 	ret = devm_regulator_bulk_get_const(dev,
 					    ARRAY_SIZE({p.short_id}_supplies),
 					    {p.short_id}_supplies,
 					    &ctx->supplies);
 	if (ret < 0)
 		return ret;
-'''
+''')
 		else:
-			s += f'''
+			parts.append(f'''
 	ctx->supply = devm_regulator_get(dev, "{options.regulator[0]}");
 	if (IS_ERR(ctx->supply))
 		return dev_err_probe(dev, PTR_ERR(ctx->supply),
 				     "Failed to get {options.regulator[0]} regulator\\n");
-'''
+''')
 
 	for name, flags in options.gpios.items():
 		# TODO: In the future, we might want to change this to keep panel alive
@@ -404,14 +426,14 @@ def generate_probe(p: Panel, options: Options) -> str:
 		if name == "reset":
 			init = "GPIOD_OUT_HIGH"
 
-		s += f'''
+		parts.append(f'''
 	ctx->{name}_gpio = devm_gpiod_get(dev, "{name}", {init});
 	if (IS_ERR(ctx->{name}_gpio))
 		return dev_err_probe(dev, PTR_ERR(ctx->{name}_gpio),
 				     "Failed to get {name}-gpios\\n");
-'''
+''')
 
-	s += f'''
+	parts.append(f'''
 	ctx->dsi = dsi;
 	mipi_dsi_set_drvdata(dsi, ctx);
 
@@ -422,10 +444,10 @@ def generate_probe(p: Panel, options: Options) -> str:
 	drm_panel_init(&ctx->panel, dev, &{p.short_id}_panel_funcs,
 		       DRM_MODE_CONNECTOR_DSI);
 	ctx->panel.prepare_prev_first = true;
-'''
+''')
 
 	if options.backlight_fallback_dcs:
-		s += f'''
+		parts.append(f'''
 	ret = drm_panel_of_backlight(&ctx->panel);
 	if (ret)
 		return dev_err_probe(dev, ret, "Failed to get backlight\\n");
@@ -437,27 +459,27 @@ def generate_probe(p: Panel, options: Options) -> str:
 			return dev_err_probe(dev, PTR_ERR(ctx->panel.backlight),
 					     "Failed to create backlight\\n");
 	}}
-'''
+''')
 	elif p.backlight == BacklightControl.DCS:
-		s += f'''
+		parts.append(f'''
 	ctx->panel.backlight = {p.short_id}_create_backlight(dsi);
 	if (IS_ERR(ctx->panel.backlight))
 		return dev_err_probe(dev, PTR_ERR(ctx->panel.backlight),
 				     "Failed to create backlight\\n");
-'''
+''')
 	elif p.backlight:
-		s += '''
+		parts.append('''
 	ret = drm_panel_of_backlight(&ctx->panel);
 	if (ret)
 		return dev_err_probe(dev, ret, "Failed to get backlight\\n");
-'''
+''')
 
-	s += '''
+	parts.append('''
 	drm_panel_add(&ctx->panel);
-'''
+''')
 
 	if p.compression_mode == CompressionMode.DSC:
-		s += f'''
+		parts.append(f'''
 	/* This panel only supports DSC; unconditionally enable it */
 	dsi->dsc = &ctx->dsc;
 
@@ -476,21 +498,21 @@ def generate_probe(p: Panel, options: Options) -> str:
 	ctx->dsc.bits_per_component = {p.dsc_bit_per_component};
 	ctx->dsc.bits_per_pixel = {p.dsc_bit_per_pixel} << 4; /* 4 fractional bits */
 	ctx->dsc.block_pred_enable = {"true" if p.dsc_block_prediction else "false"};
-'''
+''')
 
-	s += '''
+	parts.append('''
 	ret = mipi_dsi_attach(dsi);
 	if (ret < 0) {
 		drm_panel_remove(&ctx->panel);
 		return dev_err_probe(dev, ret, "Failed to attach to DSI host\\n");
 	}
-'''
+''')
 
-	s += '''
+	parts.append('''
 	return 0;
 }
-'''
-	return s
+''')
+	return ''.join(parts)
 
 
 def generate_driver(p: Panel, options: Options) -> None:
@@ -498,7 +520,7 @@ def generate_driver(p: Panel, options: Options) -> None:
 	for cmd in p.cmds.values():
 		for c in cmd.seq:
 			c.generated = c.type.generate(c.payload, options)
-			cmd.generated += c.generated
+			cmd.identifiers.update(_MIPI_DCS_IDENTIFIER.findall(c.generated))
 
 	options.gpios = {}
 	if p.reset_seq:
@@ -519,23 +541,11 @@ def generate_driver(p: Panel, options: Options) -> None:
 	if options.backlight_gpio:
 		options.gpios["backlight"] = GpioFlag.ACTIVE_HIGH
 
-	dash_id = p.short_id.replace('_', '-')
-	compatible = dash_id.split('-', 1)
-
-	# Try to guess if short id starts with vendor name (e.g. booyi)
-	if compatible[0].isalpha():
-		compatible = ','.join(compatible)
-	else:
-		# Unknown vendor
-		compatible = 'mdss,' + '-'.join(compatible)
-
-	options.compatible = compatible
-
-	module = f"panel-{dash_id}"
+	module = f"panel-{p.dash_id}"
 	with open(f'{p.id}/{module}.c', 'w') as f:
 		f.write(f'''\
 // SPDX-License-Identifier: GPL-2.0-only
-// Copyright (c) {datetime.date.today().year} FIXME
+// Copyright (c) {CURRENT_YEAR} FIXME
 // Generated with linux-mdss-dsi-panel-driver-generator from vendor device tree:
 //   Copyright (c) 2013, The Linux Foundation. All rights reserved. (FIXME)
 {generate_includes(p, options)}
@@ -577,7 +587,7 @@ def generate_driver(p: Panel, options: Options) -> None:
 }}
 
 static const struct of_device_id {p.short_id}_of_match[] = {{
-	{{ .compatible = "{compatible}" }}, // FIXME
+	{{ .compatible = "{p.compatible}" }}, // FIXME
 	{{ /* sentinel */ }}
 }};
 MODULE_DEVICE_TABLE(of, {p.short_id}_of_match);
@@ -10,33 +10,30 @@ def generate_backlight(p: Panel):
 
 
 def generate_supplies(options: Options):
-	s = ""
-	if options.regulator:
-		for r in options.regulator:
-			s += f"\t\t{r}-supply = <&...>;\n"
-	return s
+	if not options.regulator:
+		return ""
+	return ''.join(f"\t\t{r}-supply = <&...>;\n" for r in options.regulator)
 
 
 def generate_gpios(options: Options):
-	s = ""
+	parts = []
 	for name, flags in options.gpios.items():
 		flags = "GPIO_ACTIVE_LOW" if flags & GpioFlag.ACTIVE_LOW else "GPIO_ACTIVE_HIGH"
-		s += f"\t\t{name}-gpios = <&tlmm XY {flags}>;\n"
-	return s
+		parts.append(f"\t\t{name}-gpios = <&tlmm XY {flags}>;\n")
+	return ''.join(parts)
 
 
 def generate_panel_dtsi(p: Panel, options: Options) -> None:
-	name = p.short_id.replace('_', '-')
-	with open(f'{p.id}/panel-{name}.dtsi', 'w') as f:
-		if p.cphy_mode:
-			f.write('''\
+	parts = []
+	if p.cphy_mode:
+		parts.append('''\
 #include <dt-bindings/phy/phy.h>
 
 ''')
-		f.write(f'''\
+	parts.append(f'''\
 &mdss_dsi0 {{
 	panel@0 {{
-		compatible = "{options.compatible}";
+		compatible = "{p.compatible}";
 		reg = <0>;
 
 {generate_backlight(p)}\
@@ -57,15 +54,18 @@ def generate_panel_dtsi(p: Panel, options: Options) -> None:
 }};
 ''')
 
-		if p.ldo_mode:
-			f.write('''
+	if p.ldo_mode:
+		parts.append('''
 &mdss_dsi0_phy {
 	qcom,dsi-phy-regulator-ldo-mode;
 };
 ''')
-		if p.cphy_mode:
-			f.write('''
+	if p.cphy_mode:
+		parts.append('''
 &mdss_dsi0_phy {
     phy-type = <PHY_TYPE_CPHY>;
 };
 ''')
+
+	with open(f'{p.id}/panel-{p.dash_id}.dtsi', 'w') as f:
+		f.write(''.join(parts))
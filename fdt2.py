@@ -5,6 +5,10 @@
 
 
 class Fdt2(FdtRo):
+	def __init__(self, data):
+		super().__init__(data)
+		self._props = {}
+
 	def find_by_compatible(self, compatible):
 		offset = -1
 		while True:
@@ -27,9 +31,29 @@ def subnode_or_none(self, parentoffset, name):
 			return None
 		return offset
 
+	# Panels look up dozens of properties on the same nodes, so read all
+	# properties of a node once and keep them by name. Note that getprop()
+	# returns the same (mutable) Property on every call, do not modify it.
+	def props(self, nodeoffset):
+		props = self._props.get(nodeoffset)
+		if props is None:
+			props = {}
+			offset = self.first_property_offset(nodeoffset, [FDT_ERR_NOTFOUND])
+			while offset != -FDT_ERR_NOTFOUND:
+				prop = self.get_property_by_offset(offset)
+				props[prop.name] = prop
+				offset = self.next_property_offset(offset, [FDT_ERR_NOTFOUND])
+			self._props[nodeoffset] = props
+		return props
+
 	def getprop(self, nodeoffset, prop_name, quiet=()):
 		try:
-			return super().getprop(nodeoffset, prop_name, quiet)
+			prop = self.props(nodeoffset).get(prop_name)
+			if prop is not None:
+				return prop
+			if FDT_ERR_NOTFOUND in quiet:
+				return -FDT_ERR_NOTFOUND
+			raise FdtException(-FDT_ERR_NOTFOUND)
 		except:
 			print(f"ERROR: Failed to get property: {prop_name}")
 			raise
@@ -54,8 +78,7 @@ def property_is_str(self):
 
 
 def property_as_uint32_array(self):
-	num = int(len(self) / 4)
-	return list(struct.unpack('>' + ('L' * num), self))
+	return list(struct.unpack(f'>{len(self) // 4}L', self))
 
 
 Property.is_str = property_is_str
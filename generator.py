@@ -1,10 +1,14 @@
 # SPDX-License-Identifier: GPL-2.0-only
 from __future__ import annotations
 
+import datetime
 from dataclasses import dataclass
 from enum import Flag, auto
 from typing import List, Optional, TextIO, Dict
 
+# Used in the copyright header of the generated files
+CURRENT_YEAR = datetime.date.today().year
+
 
 class GpioFlag(Flag):
 	ACTIVE_HIGH = 0
@@ -21,7 +25,14 @@ class Options:
 	dcs_get_brightness: bool
 	ignore_wait: int
 	dumb_dcs: bool
+	jobs: int
 
 	# Added by panel driver generator
-	compatible: str
 	gpios: Dict[str, GpioFlag]
+
+	def __getstate__(self):
+		# The opened device tree blobs cannot be pickled and are not needed
+		# when generating panels in another process (see --jobs)
+		state = self.__dict__.copy()
+		state.pop('dtb', None)
+		return state
@@ -1,53 +1,46 @@
 # SPDX-License-Identifier: GPL-2.0-only
 from __future__ import annotations
 
-import datetime
+import struct
 
 import wrap
+from generator import CURRENT_YEAR
 from panel import Panel, Mode, CommandSequence, LaneMap, TrafficMode
 
 
 def generate_commands(p: Panel, cmd_name: str) -> str:
 	cmd: CommandSequence = p.cmds[cmd_name]
 
-	cmds = ""
-	struct = f"static struct mipi_dsi_cmd {p.id}_{cmd_name}_command[] = {{\n"
+	cmds = []
+	table = [f"static struct mipi_dsi_cmd {p.id}_{cmd_name}_command[] = {{\n"]
 
-	s = ""
 	i = 0
 	for c in cmd.seq:
-		b = bytearray()
 		long = c.type.is_long
+		data_id = c.type.value | c.vc << 6
+		flags = int(c.ack) << 5 | int(long) << 6 | int(c.last) << 7
 		if long:
-			b += int.to_bytes(len(c.payload), 2, 'little')  # Word count (WC)
-		else:
-			assert len(c.payload) <= 2, f"Payload too long: {len(c.payload)}"
-			itr = iter(c.payload)
-			b.append(next(itr, 0))
-			b.append(next(itr, 0))
-
-		b.append(c.type.value | c.vc << 6)
-		b.append(int(c.ack) << 5 | int(long) << 6 | int(c.last) << 7)
-
-		if long:
-			b += bytes(c.payload)
+			# Word count (WC), followed by the payload
+			b = struct.pack('<HBB', len(c.payload), data_id, flags) + bytes(c.payload)
 
 			# DMA command size must be multiple of 4
-			mod = len(b) % 4
-			if mod != 0:
-				b += bytes([0xff] * (4 - mod))
+			b += b'\xff' * (-len(b) & 3)
+		else:
+			assert len(c.payload) <= 2, f"Payload too long: {len(c.payload)}"
+			# Up to two data bytes, padded with zeroes
+			b = struct.pack('<2sBB', bytes(c.payload), data_id, flags)
 
 		name = f'{p.id}_{cmd_name}_cmd_{i}'
-		cmds += f'static char {name}[] = {{\n'
-		cmds += wrap.join('\t', ',', '', [f'{byte:#04x}' for byte in b], wrap=54)
-		cmds += '\n};\n'
+		cmds.append(f'static char {name}[] = {{\n')
+		cmds.append(wrap.join('\t', ',', '', [f'{byte:#04x}' for byte in b], wrap=54))
+		cmds.append('\n};\n')
 
-		struct += f'\t{{ sizeof({name}), {name}, {c.wait} }},\n'
+		table.append(f'\t{{ sizeof({name}), {name}, {c.wait} }},\n')
 		i += 1
 
-	struct += '};'
+	table.append('};')
 
-	return cmds + '\n' + struct
+	return ''.join(cmds) + '\n' + ''.join(table)
 
 
 def generate_cmd_info(p: Panel) -> str:
@@ -69,7 +62,7 @@ def generate_video_info(p: Panel) -> str:
 	.hsa_power_mode = {int('MIPI_DSI_MODE_VIDEO_NO_HSA' in p.flags)},
 	.bllp_eof_power_mode = {int(p.bllp_eof_power_mode)},
 	.bllp_power_mode = {int(p.bllp_power_mode)},
-	.traffic_mode = {list(TrafficMode.__members__.values()).index(p.traffic_mode)},
+	.traffic_mode = {TrafficMode._MEMBERS.index(p.traffic_mode)},
 	/* This is bllp_eof_power_mode and bllp_power_mode combined */
 	.bllp_eof_power = {int(p.bllp_eof_power_mode)} << 3 | {int(p.bllp_power_mode)} << 0,
 '''
@@ -111,7 +104,7 @@ def generate_lk_driver(p: Panel) -> None:
 	with open(f'{p.id}/lk_panel_{p.id}.h', 'w') as f:
 		f.write(f'''\
 // SPDX-License-Identifier: GPL-2.0-only
-// Copyright (c) {datetime.date.today().year} FIXME
+// Copyright (c) {CURRENT_YEAR} FIXME
 // Generated with linux-mdss-dsi-panel-driver-generator from vendor device tree:
 //   Copyright (c) 2014, The Linux Foundation. All rights reserved. (FIXME)
 
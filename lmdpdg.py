@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 # SPDX-License-Identifier: GPL-2.0-only
 import argparse
+import contextlib
+import functools
+import io
 import os
-import shutil
 import sys
 import traceback
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import generator
 from driver import generate_driver
@@ -18,11 +22,9 @@
 def generate(p: Panel, options: generator.Options) -> None:
 	print(f"Generating: {p.id} ({p.name})")
 
-	if os.path.exists(p.id):
-		shutil.rmtree(p.id)
-	os.mkdir(p.id)
+	os.makedirs(p.id, exist_ok=True)
 
-	if not args.backlight:
+	if not options.backlight:
 		p.backlight = None
 
 	generate_panel_simple(p)
@@ -31,6 +33,36 @@ def generate(p: Panel, options: generator.Options) -> None:
 	generate_lk_driver(p)
 
 
+def generate_or_print_exc(p: Panel, options: generator.Options) -> bool:
+	try:
+		generate(p, options)
+		return True
+	except:
+		traceback.print_exc(file=sys.stdout)
+		return False
+
+
+# Collect all messages of panels generated in a worker process,
+# so they can be printed together with the panel they belong to.
+# The panels are generated in order, so the last one wins if they
+# are written to the same directory (like without --jobs).
+def generate_captured(panels: List[Panel], options: generator.Options) -> List[Tuple[bool, str]]:
+	results = []
+	for p in panels:
+		with io.StringIO() as out:
+			with contextlib.redirect_stdout(out):
+				success = generate_or_print_exc(p, options)
+			results.append((success, out.getvalue()))
+	return results
+
+
+def positive_int(value: str) -> int:
+	i = int(value)
+	if i < 1:
+		raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+	return i
+
+
 parser = argparse.ArgumentParser(
 	description="Generate Linux DRM panel driver based on (downstream) MDSS DSI device tree")
 parser.add_argument('dtb', nargs='+', type=argparse.FileType('rb'), help="Device tree blobs to parse")
@@ -64,22 +96,76 @@ def generate(p: Panel, options: generator.Options) -> None:
 	enter/exit_sleep_mode and set_display_on/off (which should be supported by
 	any panel ideally).
 """)
-args = parser.parse_args(namespace=generator.Options())
-
-for f in args.dtb:
-	with f:
-		print(f"Parsing: {f.name}")
-		fdt = Fdt2(f.read())
-
-		found = False
-		for offset in Panel.find(fdt):
-			try:
-				panel = Panel.parse(fdt, offset)
-				if panel:
-					generate(panel, args)
-					found = True
-			except:
-				traceback.print_exc(file=sys.stdout)
-
-		if not found:
-			print(f"{f.name} does not contain any usable panel specifications")
+parser.add_argument('-j', '--jobs', type=positive_int, default=1, help="""
+	Generate the panels of all device tree blobs with the specified number
+	of parallel processes. Panels with the same id are written to the same
+	directory, they are generated one after another and the last one wins.
+""")
+
+
+def parse_panels(fdt: Fdt2) -> Iterator[Panel]:
+	for offset in Panel.find(fdt):
+		try:
+			panel = Panel.parse(fdt, offset)
+			if panel:
+				yield panel
+		except:
+			traceback.print_exc(file=sys.stdout)
+
+
+def run(args: generator.Options, executor: Optional[Executor]) -> None:
+	if not executor:
+		gen = functools.partial(generate_or_print_exc, options=args)
+		for f in args.dtb:
+			with f:
+				print(f"Parsing: {f.name}")
+				results = list(map(gen, parse_panels(Fdt2(f.read()))))
+			if not any(results):
+				print(f"{f.name} does not contain any usable panel specifications")
+		return
+
+	# Parse all device tree blobs first, so that panels from different files
+	# are generated in parallel. Messages are still printed per file, in order.
+	dtbs = []
+	groups: Dict[str, List[Panel]] = {}
+	for f in args.dtb:
+		with f, io.StringIO() as out:
+			with contextlib.redirect_stdout(out):
+				print(f"Parsing: {f.name}")
+				panels = list(parse_panels(Fdt2(f.read())))
+			dtbs.append((f.name, out.getvalue(), panels))
+
+		for p in panels:
+			groups.setdefault(p.id, []).append(p)
+
+	# Panels with the same id write to the same directory,
+	# so generate them in the same task
+	gen_captured = functools.partial(generate_captured, options=args)
+	futures = {i: executor.submit(gen_captured, group) for i, group in groups.items()}
+
+	outputs = {}
+	for name, log, panels in dtbs:
+		print(log, end='')
+
+		results = []
+		for p in panels:
+			if p.id not in outputs:
+				outputs[p.id] = iter(futures[p.id].result())
+			success, out = next(outputs[p.id])
+			print(out, end='')
+			results.append(success)
+
+		if not any(results):
+			print(f"{name} does not contain any usable panel specifications")
+
+
+def main(args: generator.Options) -> None:
+	if args.jobs > 1:
+		with ProcessPoolExecutor(args.jobs) as executor:
+			run(args, executor)
+	else:
+		run(args, None)
+
+
+if __name__ == '__main__':
+	main(parser.parse_args(namespace=generator.Options()))
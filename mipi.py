@@ -30,8 +30,12 @@ def _hex_fill(i: int, size: int = 1) -> str:
 	return f'{i:#0{size * 2 + 2}x}'
 
 
+# Payloads are formatted byte by byte, so format all possible values only once
+_HEX_BYTES = tuple(_hex_fill(i) for i in range(256))
+
+
 def _get_params_hex(b: bytes) -> List[str]:
-	return [_hex_fill(i) for i in b]
+	return [_HEX_BYTES[i] for i in b]
 
 
 def _get_params_int(size: int, byteorder: str):
@@ -143,9 +147,8 @@ def get_params(self, b: bytes):
 
 	@staticmethod
 	def find(payload: bytes, dumb: bool) -> Optional[DCSCommand]:
-		try:
-			dcs = DCSCommand(payload[0])
-		except ValueError:
+		dcs = DCSCommand._BY_VALUE.get(payload[0])
+		if dcs is None:
 			# Not a specified DCS command
 			return None
 
@@ -170,6 +173,7 @@ def find(payload: bytes, dumb: bool) -> Optional[DCSCommand]:
 		return dcs
 
 
+DCSCommand._BY_VALUE = {dcs.value: dcs for dcs in DCSCommand}
 DCSCommand._DUMB_ALLOWED = [DCSCommand.ENTER_SLEEP_MODE, DCSCommand.EXIT_SLEEP_MODE,
 							DCSCommand.SET_DISPLAY_ON, DCSCommand.SET_DISPLAY_OFF]
 
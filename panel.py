@@ -1,10 +1,11 @@
 # SPDX-License-Identifier: GPL-2.0-only
 from __future__ import annotations
 
-import itertools
+import re
+import struct
 from dataclasses import dataclass
 from enum import Enum, unique
-from typing import Iterator, List, Optional
+from typing import Iterator, List, Optional, Set
 
 import libfdt
 
@@ -46,16 +47,19 @@ def parse(prop: libfdt.Property) -> Optional[TrafficMode]:
 		# Some Samsung panels have the traffic mode as index for some reason
 		if len(prop) == 4:
 			i = prop.as_uint32()
-			traffic_modes = list(TrafficMode.__members__.values())
-			if i < len(traffic_modes):
-				print(f"Interpreting qcom,mdss-dsi-traffic-mode as numeric index: {i} == {traffic_modes[i]}")
-				return traffic_modes[i]
+			if i < len(TrafficMode._MEMBERS):
+				print(f"Interpreting qcom,mdss-dsi-traffic-mode as numeric index: {i} == {TrafficMode._MEMBERS[i]}")
+				return TrafficMode._MEMBERS[i]
 
 		# Use the default in mdss_dsi_panel.c
 		print("Falling back to MIPI_DSI_MODE_VIDEO_SYNC_PULSE")
 		return TrafficMode.SYNC_PULSE
 
 
+# Members in definition order, the numeric index is used by downstream
+TrafficMode._MEMBERS = tuple(TrafficMode)
+
+
 @unique
 class LaneMap(Enum):
 	MAP_0123 = [0, 1, 2, 3]
@@ -73,9 +77,10 @@ def __new__(cls, log2phys: List[int]) -> LaneMap:
 		# Logical lane -> physical lane (used in downstream)
 		obj.log2phys = log2phys
 		# Physical lane -> logical lane (used in mainline)
-		obj.phys2log = [0, 0, 0, 0]
+		phys2log = [0, 0, 0, 0]
 		for i, n in enumerate(log2phys):
-			obj.phys2log[n] = i
+			phys2log[n] = i
+		obj.phys2log = bytes(phys2log)
 		return obj
 
 	@staticmethod
@@ -103,6 +108,8 @@ class CompressionMode(Enum):
 
 
 class Dimension:
+	__slots__ = ('type', 'px', 'fp', 'bp', 'pw', 'size')
+
 	@unique
 	class Type(Enum):
 		HORIZONTAL = 'h', 'width'
@@ -121,6 +128,10 @@ def __init__(self, fdt: Fdt2, panel_node: int, mode_node: int, t: Type) -> None:
 		self.size = fdt.getprop_uint32(panel_node, f'qcom,mdss-pan-physical-{t.size}-dimension')
 
 
+# Header of a command in qcom,mdss-dsi-*-command: dtype, last, vc, ack, wait, dlen
+_COMMAND_HEADER = struct.Struct('>5BH')
+
+
 @dataclass
 class Command:
 	type: mipi.Transaction
@@ -133,7 +144,10 @@ class Command:
 
 
 class CommandSequence:
-	generated: str = ''
+	__slots__ = ('state', 'seq', 'identifiers')
+
+	# MIPI_DCS_* identifiers used by the generated code
+	identifiers: Set[str]
 
 	@unique
 	class State(Enum):
@@ -143,27 +157,40 @@ class State(Enum):
 	def __init__(self, fdt: Fdt2, node: int, cmd: str) -> None:
 		self.state = CommandSequence.State(fdt.getprop(node, f'qcom,mdss-dsi-{cmd}-command-state').as_str())
 		self.seq = []
+		self.identifiers = set()
 
 		prop = fdt.getprop_or_none(node, f'qcom,mdss-dsi-{cmd}-command')
 		if prop is None:
 			print(f'Warning: qcom,mdss-dsi-{cmd}-command does not exist')
 			return  # No commands
-		itr = iter(prop)
+		props = [(f'qcom,mdss-dsi-{cmd}-command', prop)]
 
 		if cmd == 'on':
 			# WHY SONY/LG, WHY?????? Just put it in on-command...
 			init = fdt.getprop_or_none(node, 'somc,mdss-dsi-init-command')
 			if init:
-				itr = itertools.chain(init, itr)
+				props.insert(0, ('somc,mdss-dsi-init-command', init))
 
 			on = fdt.getprop_or_none(node, 'lge,display-on-cmds')
 			if on:
-				itr = itertools.chain(itr, on)
+				props.append(('lge,display-on-cmds', on))
+
+		for name, prop in props:
+			self._parse(name, bytes(prop))
 
-		for dtype in itr:
-			last, vc, ack, wait = next(itr), next(itr), next(itr), next(itr)
-			dlen = next(itr) << 8 | next(itr)
-			payload = bytes(next(itr) for _ in range(0, dlen))
+	def _parse(self, name: str, buf: bytes) -> None:
+		i = 0
+		while i < len(buf):
+			start = i + _COMMAND_HEADER.size
+			if start > len(buf):
+				raise ValueError(f'Truncated command header in {name} at offset {i}: {buf[i:].hex()}')
+
+			dtype, last, vc, ack, wait, dlen = _COMMAND_HEADER.unpack_from(buf, i)
+			payload = buf[start:start + dlen]
+			if len(payload) != dlen:
+				raise ValueError(f'Truncated command in {name} at offset {i}: header {buf[i:start].hex()}, '
+								 f'expected {dlen} bytes of payload but only {len(payload)} are left')
+			i = start + dlen
 
 			t = mipi.Transaction(dtype)
 
@@ -176,10 +203,8 @@ def __init__(self, fdt: Fdt2, node: int, cmd: str) -> None:
 			self.seq.append(Command(t, last, vc, ack, wait, payload))
 
 
-def _remove_prefixes(text: str, *args: str) -> str:
-	for prefix in args:
-		text = text[len(prefix):] if text.startswith(prefix) else text
-	return text
+# Vendor prefixes stripped from the node name (in this order, if present)
+_ID_PREFIXES = re.compile(r'^(?:qcom,mdss_dsi_)?(?:ss_dsi_panel_)?(?:mot_)?')
 
 
 def _replace_all(text: str, *args: str) -> str:
@@ -193,6 +218,17 @@ def _remove_before(text: str, sub: str) -> str:
 	return text[i + 1:] if i >= 0 else text
 
 
+def _guess_compatible(dash_id: str) -> str:
+	compatible = dash_id.split('-', 1)
+
+	# Try to guess if short id starts with vendor name (e.g. booyi)
+	if compatible[0].isalpha():
+		return ','.join(compatible)
+
+	# Unknown vendor
+	return 'mdss,' + '-'.join(compatible)
+
+
 def _find_mode_node(fdt: Fdt2, node: int) -> int:
 	timings_node = fdt.subnode_or_none(node, "qcom,mdss-dsi-display-timings")
 	if timings_node is None:
@@ -213,11 +249,13 @@ class Panel:
 	def __init__(self, name: str, fdt: Fdt2, node: int) -> None:
 		self.name = name
 		self.node_name = fdt.get_name(node)
-		self.id = _remove_before(_remove_prefixes(self.node_name, 'qcom,mdss_dsi_', 'ss_dsi_panel_', 'mot_').lower(), ',')
+		self.id = _remove_before(_ID_PREFIXES.sub('', self.node_name, 1).lower(), ',')
 		print(f'Parsing: {self.id} ({name})')
 		self.short_id = _replace_all(self.id, '_panel', '_video', '_vid', '_cmd',
 									 '_fhd', '_hd', '_qhd', '_720p', '_1080p',
 									 '_wvga', '_fwvga', '_qvga', '_xga', '_wxga')
+		self.dash_id = self.short_id.replace('_', '-')
+		self.compatible = _guess_compatible(self.dash_id)
 
 		# Newer SoCs can use panels in different modes (resolution, refresh rate etc).
 		# We don't support this properly yet but many panels just have a single mode
@@ -237,8 +275,9 @@ def __init__(self, name: str, fdt: Fdt2, node: int) -> None:
 			print("WARNING: DCS backlight without maximum brightness, ignoring...")
 			self.backlight = None
 
+		props = fdt.props(node)
 		self.lanes = 0
-		while fdt.getprop_or_none(node, f'qcom,mdss-dsi-lane-{self.lanes}-state') is not None:
+		while f'qcom,mdss-dsi-lane-{self.lanes}-state' in props:
 			self.lanes += 1
 		self.lane_map = LaneMap.parse(fdt.getprop_or_none(node, 'qcom,mdss-dsi-lane-map'))
 
@@ -264,8 +303,8 @@ def __init__(self, name: str, fdt: Fdt2, node: int) -> None:
 
 		reset_seq = fdt.getprop_or_none(node, 'qcom,mdss-dsi-reset-sequence')
 		if reset_seq is not None:
-			itr = iter(reset_seq.as_uint32_array())
-			self.reset_seq = list(zip(itr, itr))
+			# (state, sleep) pairs, an incomplete trailing pair is ignored
+			self.reset_seq = list(struct.iter_unpack('>II', reset_seq[:len(reset_seq) & ~7]))
 		else:
 			self.reset_seq = None
 
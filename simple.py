@@ -6,27 +6,28 @@
 
 
 def generate_mode(p: Panel) -> str:
+	h = p.h
+	v = p.v
 	return f'''\
 static const struct drm_display_mode {p.short_id}_mode = {{
-	.clock = ({p.h.px} + {p.h.fp} + {p.h.pw} + {p.h.bp}) * ({p.v.px} + {p.v.fp} + {p.v.pw} + {p.v.bp}) * {p.framerate} / 1000,
-	.hdisplay = {p.h.px},
-	.hsync_start = {p.h.px} + {p.h.fp},
-	.hsync_end = {p.h.px} + {p.h.fp} + {p.h.pw},
-	.htotal = {p.h.px} + {p.h.fp} + {p.h.pw} + {p.h.bp},
-	.vdisplay = {p.v.px},
-	.vsync_start = {p.v.px} + {p.v.fp},
-	.vsync_end = {p.v.px} + {p.v.fp} + {p.v.pw},
-	.vtotal = {p.v.px} + {p.v.fp} + {p.v.pw} + {p.v.bp},
-	.width_mm = {p.h.size},
-	.height_mm = {p.v.size},
+	.clock = ({h.px} + {h.fp} + {h.pw} + {h.bp}) * ({v.px} + {v.fp} + {v.pw} + {v.bp}) * {p.framerate} / 1000,
+	.hdisplay = {h.px},
+	.hsync_start = {h.px} + {h.fp},
+	.hsync_end = {h.px} + {h.fp} + {h.pw},
+	.htotal = {h.px} + {h.fp} + {h.pw} + {h.bp},
+	.vdisplay = {v.px},
+	.vsync_start = {v.px} + {v.fp},
+	.vsync_end = {v.px} + {v.fp} + {v.pw},
+	.vtotal = {v.px} + {v.fp} + {v.pw} + {v.bp},
+	.width_mm = {h.size},
+	.height_mm = {v.size},
 	.type = DRM_MODE_TYPE_DRIVER,
 }};
 '''
 
 
 def generate_panel_simple(p: Panel) -> None:
-	name = p.short_id.replace('_', '-')
-	with open(f'{p.id}/panel-simple-{name}.c', 'w') as f:
+	with open(f'{p.id}/panel-simple-{p.dash_id}.c', 'w') as f:
 		f.write(f'''\
 // SPDX-License-Identifier: GPL-2.0-only
 // Copyright (c) 2013, The Linux Foundation. All rights reserved.
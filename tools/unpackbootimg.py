@@ -1,22 +1,21 @@
 #!/usr/bin/env python
 # SPDX-License-Identifier: GPL-2.0-only
+import mmap
 import struct
 import sys
 
 BOOT_MAGIC = 'ANDROID!'.encode()
 
-HEADER_FORMAT = '<8s10I16s512s32s1024s'
-HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HEADER = struct.Struct('<8s10I16s512s32s1024s')
 
 
-def extract_file(f, name, pos, size):
-	f.seek(pos)
+def extract_file(b, name, pos, size):
 	with open(name, 'wb') as o:
-		o.write(f.read(size))
+		o.write(b[pos:pos + size])
 
 
-def unpack_image(f):
-	header = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE)[:HEADER_SIZE])
+def unpack_image(b):
+	header = HEADER.unpack_from(b)
 
 	# Ensure this is an Android boot image
 	if header[0] != BOOT_MAGIC:
@@ -30,22 +29,22 @@ def unpack_image(f):
 
 	kernel_size = header[1]
 	if kernel_size:
-		extract_file(f, 'kernel.img', offset, kernel_size)
+		extract_file(b, 'kernel.img', offset, kernel_size)
 		offset += (kernel_size + page_mask) & ~page_mask
 
 	ramdisk_size = header[3]
 	if ramdisk_size:
-		extract_file(f, 'ramdisk.img', offset, ramdisk_size)
+		extract_file(b, 'ramdisk.img', offset, ramdisk_size)
 		offset += (ramdisk_size + page_mask) & ~page_mask
 
 	second_size = header[5]
 	if second_size:
-		extract_file(f, 'second.img', offset, second_size)
+		extract_file(b, 'second.img', offset, second_size)
 		offset += (second_size + page_mask) & ~page_mask
 
 	dtb_size = header[9]
 	if dtb_size > 1:
-		extract_file(f, 'dtb.img', offset, dtb_size)
+		extract_file(b, 'dtb.img', offset, dtb_size)
 		offset += (dtb_size + page_mask) & ~page_mask
 
 	# Extract command line
@@ -56,4 +55,4 @@ def unpack_image(f):
 
 
 with open(sys.argv[1], 'rb') as f:
-	unpack_image(f)
+	unpack_image(memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)))
@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+import mmap
 import struct
 import sys
 from dataclasses import dataclass
@@ -6,14 +7,13 @@
 
 QCDT_MAGIC = 'QCDT'.encode()
 
-HEADER_FORMAT = '<4sII'
-HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HEADER = struct.Struct('<4sII')
 
 PAGE_SIZE = 2048
-ENTRY_FORMATS = (
-	'<IIIII',
-	'<IIIIII',
-	'<IIIIIIIIII',
+ENTRIES = (
+	struct.Struct('<IIIII'),
+	struct.Struct('<IIIIII'),
+	struct.Struct('<IIIIIIIIII'),
 )
 
 
@@ -29,9 +29,9 @@ class DTRecord:
 
 
 with open(sys.argv[1], 'rb') as f:
-	b = f.read()
+	b = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
 
-magic, version, n = struct.unpack(HEADER_FORMAT, b[:HEADER_SIZE])
+magic, version, n = HEADER.unpack_from(b)
 if magic != QCDT_MAGIC:
 	print("Image does not appear to be an QCDT image")
 	exit(1)
@@ -40,12 +40,11 @@ class DTRecord:
 
 records = []
 
-offset = HEADER_SIZE
+entry_struct = ENTRIES[version - 1]
+offset = HEADER.size
 for i in range(0, n):
-	entry_format = ENTRY_FORMATS[version - 1]
-	size = struct.calcsize(entry_format)
-	entry = struct.unpack(entry_format, b[offset:offset + size])
-	offset += size
+	entry = entry_struct.unpack_from(b, offset)
+	offset += entry_struct.size
 
 	r = DTRecord(entry[0], entry[1], entry[2], entry[-2], entry[-1])
 
@@ -35,6 +35,7 @@ def join(prefix: str, sep: str, end: str, items: List[str], force: int = -1, wra
 
 	s = ''
 	line = ''
+	width = 0  # _width(line), maintained incrementally
 
 	last = len(items) - 1
 	for i, item in enumerate(items):
@@ -42,13 +43,16 @@ def join(prefix: str, sep: str, end: str, items: List[str], force: int = -1, wra
 			sep = end
 
 		if line:
-			if force == i or _width(line) + len(item) + len(sep) > wrap:
+			if force == i or width + len(item) + len(sep) > wrap:
 				s += prefix + line + '\n'
 				prefix = indent
 				line = ''
+				width = 0
 			else:
 				line += ' '
+				width += 1
 		line += item + sep
+		width += _width(item + sep)
 
 	s += prefix + line
 	return s